@@ -7,38 +7,77 @@ Example usage:
         --object_path my_object.glb \
         --output_dir ./views \
         --num_images 64
+
+To render many objects in a single Blender session, pass a JSON list of
+paths/URLs instead:
+    blender -b -P blender_script_mvd_fusion.py -- \
+        --object_list batch.json \
+        --output_dir ./views
 """
 
 import argparse
 import math
 import os
+import shutil
 import sys
 import time
-import urllib.request
-from typing import Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Tuple
 import json
 import bpy
+import numpy as np
+import requests
 from mathutils import Vector
-import ssl
-ssl._create_default_https_context = ssl._create_unverified_context
+from requests.adapters import HTTPAdapter
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
+object_group = parser.add_mutually_exclusive_group(required=True)
+object_group.add_argument(
     "--object_path",
     type=str,
-    required=True,
     help="Path to the object file",
 )
+object_group.add_argument(
+    "--object_list",
+    type=str,
+    help="Path to a json file containing a list of object paths/URLs",
+)
 parser.add_argument("--output_dir", type=str, default="./views")
 parser.add_argument(
     "--engine", type=str, default="CYCLES", choices=["CYCLES", "BLENDER_EEVEE"]
 )
+parser.add_argument(
+    "--device_type", type=str, default="OPTIX", choices=["OPTIX", "CUDA"]
+)
 parser.add_argument("--num_images", type=int, default=64)
 parser.add_argument("--camera_dist", type=float, default=1.5)
+parser.add_argument(
+    "--modalities",
+    type=str,
+    default="rgb,depth,mask",
+    help="Comma separated subset of rgb,depth,mask to render",
+)
+parser.add_argument(
+    "--num_prefetch",
+    type=int,
+    default=2,
+    help="Number of objects downloaded ahead of the one being rendered",
+)
+parser.add_argument(
+    "--failed_list",
+    type=str,
+    default=None,
+    help="Path of a json file the paths/URLs of objects that failed are written to",
+)
 
 argv = sys.argv[sys.argv.index("--") + 1 :]
 args = parser.parse_args(argv)
 
+MODALITIES = set(args.modalities.split(","))
+if not MODALITIES or not MODALITIES <= {"rgb", "depth", "mask"}:
+    parser.error(f"invalid --modalities: {args.modalities}")
+
 context = bpy.context
 scene = context.scene
 render = scene.render
@@ -52,15 +91,66 @@ render.resolution_x = 256  # FIXED: MVD-Fusion resolution
 render.resolution_y = 256
 render.resolution_percentage = 100
 
+
+def setup_gpu_devices(device_type: str) -> str:
+    """Enables only the GPUs of the given backend (no CPU+GPU hybrid rendering),
+    falling back from OPTIX to CUDA. Returns the backend in use."""
+    cycles_prefs = context.preferences.addons["cycles"].preferences
+    backends = [device_type] + (["CUDA"] if device_type == "OPTIX" else [])
+    for backend in backends:
+        cycles_prefs.compute_device_type = backend
+        cycles_prefs.get_devices()
+        enabled = 0
+        for device in cycles_prefs.devices:
+            device.use = device.type == backend
+            enabled += device.use
+        if enabled:
+            if backend != device_type:
+                print(f"⚠️ No {device_type} devices found, rendering with {backend}")
+            return backend
+    raise RuntimeError(
+        f"No {' or '.join(backends)} GPU available for Cycles "
+        f"(CUDA_VISIBLE_DEVICES={os.environ.get('CUDA_VISIBLE_DEVICES')})"
+    )
+
+
+device_type = None
+if args.engine == "CYCLES":
+    try:
+        device_type = setup_gpu_devices(args.device_type)
+    except RuntimeError as e:
+        # Blender exits 0 on script errors, make the failure reach the exit status
+        print(f"❌ {e}")
+        sys.exit(1)
+
 scene.cycles.device = "GPU"
 scene.cycles.samples = 32
 scene.cycles.diffuse_bounces = 1
 scene.cycles.glossy_bounces = 1
 scene.cycles.transparent_max_bounces = 3
 scene.cycles.transmission_bounces = 3
-scene.cycles.filter_width = 0.01
+scene.cycles.use_adaptive_sampling = True  # samples is an upper bound per pixel
+scene.cycles.adaptive_threshold = 0.01
+scene.cycles.adaptive_min_samples = 4
 scene.cycles.use_denoising = True
+scene.cycles.denoiser = "OPTIX" if device_type == "OPTIX" else "OPENIMAGEDENOISE"
 scene.render.film_transparent = True
+# Keep BVH, compiled shaders and GPU buffers alive between frames
+scene.render.use_persistent_data = True
+# Spatial splits give little at 256x256 but slow down BVH builds of dense meshes
+scene.cycles.debug_use_spatial_splits = False
+# Tiling is left at Blender's defaults (auto tile, 2048 px): the 256x256 frame
+# already renders as one tile, and smaller tiles would only split each frame
+# into more GPU launches
+
+if "rgb" not in MODALITIES:
+    # Depth and mask converge in a single sample, skip full path tracing
+    scene.cycles.samples = 1
+    scene.cycles.use_denoising = False
+    # Same for an explicit --engine BLENDER_EEVEE. The engine itself is left
+    # alone: Eevee renders on the X display's GPU and ignores
+    # CUDA_VISIBLE_DEVICES, which would stack render_pool.py workers on one GPU
+    scene.eevee.taa_render_samples = 1
 
 # MVD-Fusion camera parameters (from dataset/objaverse.py)
 AZIMUTHS_16 = [
@@ -77,10 +167,31 @@ ELEVATIONS_16 = [
     0.5235987901687622, 0.5235987901687622, 0.5235987901687622, 0.5235987901687622
 ]
 
+# Camera positions for all 16 views from azimuth and elevation (MVD-Fusion format)
+_azimuths = np.array(AZIMUTHS_16)
+_elevations = np.array(ELEVATIONS_16)
+CAM_POS = args.camera_dist * np.stack(
+    [
+        np.cos(_azimuths) * np.cos(_elevations),
+        np.sin(_azimuths) * np.cos(_elevations),
+        np.sin(_elevations),
+    ],
+    axis=1,
+)
+
+# Views rendered per object, one animation frame each
+NUM_VIEWS = min(args.num_images, 16)
+
+# Objects created once per Blender session and shared by every rendered object
+RIG_OBJECTS = {"Camera", "Area", "Empty"}
+
 
 def setup_compositor_for_depth_and_mask(views_dir):
     """
     NEW: Setup compositor to render RGB, Depth, and Mask in single pass
+
+    Only the requested modalities are wired up. Returns a dict mapping
+    "depth"/"mask" to their file output nodes.
     """
     scene = bpy.context.scene
     scene.use_nodes = True
@@ -96,33 +207,31 @@ def setup_compositor_for_depth_and_mask(views_dir):
     # RGB output (goes to scene.render.filepath)
     composite_rgb = tree.nodes.new(type='CompositorNodeComposite')
     composite_rgb.location = 400, 200
-    tree.links.new(render_layers.outputs['Image'], composite_rgb.inputs['Image'])
-    
-    # Depth normalization
-    normalize = tree.nodes.new(type='CompositorNodeNormalize')
-    normalize.location = 200, -100
-    tree.links.new(render_layers.outputs['Depth'], normalize.inputs[0])
+    if "rgb" in MODALITIES:
+        tree.links.new(render_layers.outputs['Image'], composite_rgb.inputs['Image'])
     
-    # Map to 0-1 range
-    map_range = tree.nodes.new(type='CompositorNodeMapValue')
-    map_range.location = 400, -100
-    map_range.offset = [0.0]
-    map_range.size = [1.0]
-    map_range.use_min = True
-    map_range.min = [0.0]
-    map_range.use_max = True
-    map_range.max = [1.0]
-    tree.links.new(normalize.outputs[0], map_range.inputs[0])
-    
-    # File output for depth
+    file_outputs = {}
+    if "depth" in MODALITIES:
+        file_outputs["depth"] = _add_depth_output(tree, render_layers, views_dir)
+    if "mask" in MODALITIES:
+        file_outputs["mask"] = _add_mask_output(tree, render_layers, views_dir)
+    return file_outputs
+
+
+def _add_depth_output(tree, render_layers, views_dir):
+    # File output for depth, raw distances as half float EXR (no normalization)
     depth_output = tree.nodes.new(type='CompositorNodeOutputFile')
-    depth_output.location = 600, -100
+    depth_output.location = 400, -100
     depth_output.base_path = views_dir
-    depth_output.format.file_format = 'PNG'
+    depth_output.format.file_format = 'OPEN_EXR'
     depth_output.format.color_mode = 'BW'
     depth_output.format.color_depth = '16'
-    tree.links.new(map_range.outputs[0], depth_output.inputs[0])
-    
+    depth_output.format.exr_codec = 'ZIP'
+    tree.links.new(render_layers.outputs['Depth'], depth_output.inputs[0])
+    return depth_output
+
+
+def _add_mask_output(tree, render_layers, views_dir):
     # Mask output (alpha channel)
     mask_output = tree.nodes.new(type='CompositorNodeOutputFile')
     mask_output.location = 600, -300
@@ -131,8 +240,7 @@ def setup_compositor_for_depth_and_mask(views_dir):
     mask_output.format.color_mode = 'BW'
     mask_output.format.quality = 90
     tree.links.new(render_layers.outputs['Alpha'], mask_output.inputs[0])
-    
-    return depth_output, mask_output
+    return mask_output
 
 
 def add_lighting() -> None:
@@ -150,16 +258,13 @@ def add_lighting() -> None:
 
 
 def reset_scene() -> None:
-    """Resets the scene to a clean state."""
-    for obj in bpy.data.objects:
-        if obj.type not in {"CAMERA", "LIGHT"}:
+    """Resets the scene to a clean state, keeping the camera rig and lighting."""
+    for obj in list(bpy.context.scene.objects):
+        if obj.name not in RIG_OBJECTS:
             bpy.data.objects.remove(obj, do_unlink=True)
-    for material in bpy.data.materials:
-        bpy.data.materials.remove(material, do_unlink=True)
-    for texture in bpy.data.textures:
-        bpy.data.textures.remove(texture, do_unlink=True)
-    for image in bpy.data.images:
-        bpy.data.images.remove(image, do_unlink=True)
+    # Also frees the meshes, materials, textures and images the removed objects
+    # leave behind, so long --object_list sessions don't accumulate them
+    bpy.data.orphans_purge(do_recursive=True)
 
 
 def load_object(object_path: str) -> None:
@@ -191,7 +296,7 @@ def scene_bbox(single_obj=None, ignore_matrix=False):
 
 def scene_root_objects():
     for obj in bpy.context.scene.objects.values():
-        if not obj.parent:
+        if not obj.parent and obj.name not in RIG_OBJECTS:
             yield obj
 
 
@@ -224,15 +329,48 @@ def setup_camera():
     return cam, cam_constraint
 
 
-def get_camera_position(azimuth, elevation, distance=1.5):
-    """Get camera position from azimuth and elevation (MVD-Fusion format)"""
-    x = distance * math.cos(azimuth) * math.cos(elevation)
-    y = distance * math.sin(azimuth) * math.cos(elevation)
-    z = distance * math.sin(elevation)
-    return (x, y, z)
+def clear_object_animations():
+    """Removes object, shape key (morph target) and material/node tree
+    animations from the loaded objects."""
+    for obj in bpy.context.scene.objects:
+        if obj.name in RIG_OBJECTS:
+            continue
+        obj.animation_data_clear()
+        if obj.data is not None and hasattr(obj.data, "animation_data_clear"):
+            obj.data.animation_data_clear()
+        shape_keys = getattr(obj.data, "shape_keys", None)
+        if shape_keys is not None:
+            shape_keys.animation_data_clear()
+        for slot in obj.material_slots:
+            material = slot.material
+            if material is None:
+                continue
+            material.animation_data_clear()
+            if material.node_tree is not None:
+                material.node_tree.animation_data_clear()
+
+
+def setup_scene():
+    """Adds the lighting, camera rig and compositor shared by all objects."""
+    add_lighting()
+    cam, cam_constraint = setup_camera()
+
+    # Create empty object to track
+    empty = bpy.data.objects.new("Empty", None)
+    scene.collection.objects.link(empty)
+    cam_constraint.target = empty
+
+    # Keyframe up to 16 MVD-Fusion camera poses, one view per frame
+    for i in range(NUM_VIEWS):
+        cam.location = CAM_POS[i].tolist()
+        cam.keyframe_insert("location", frame=i)
+
+    # Setup compositor for depth and mask, output paths are set per object
+    file_outputs = setup_compositor_for_depth_and_mask(args.output_dir)
+    return cam, file_outputs
 
 
-def save_images(object_file: str) -> None:
+def save_images(object_file: str, cam, file_outputs) -> None:
     """
     FIXED: Saves RGB, Depth, and Mask images in MVD-Fusion format
     """
@@ -241,68 +379,45 @@ def save_images(object_file: str) -> None:
     
     # Load object
     load_object(object_file)
-    object_uid = os.path.basename(object_file).split(".")[0]
+    # Views are rendered as animation frames, keep animated objects static
+    clear_object_animations()
+    # Importers may change the frame range, so set it for every object
+    scene.frame_start = 0
+    scene.frame_end = NUM_VIEWS - 1
+    object_uid = get_object_uid(object_file)
     normalize_scene()
-    add_lighting()
-    cam, cam_constraint = setup_camera()
-    
-    # Create empty object to track
-    empty = bpy.data.objects.new("Empty", None)
-    scene.collection.objects.link(empty)
-    cam_constraint.target = empty
 
     # FIXED: Create nested views directory
     views_dir = os.path.join(args.output_dir, object_uid, "views")
     os.makedirs(views_dir, exist_ok=True)
-    
-    # NEW: Setup compositor for depth and mask
-    depth_output, mask_output = setup_compositor_for_depth_and_mask(views_dir)
 
-    # Render up to 64 views using MVD-Fusion camera poses
-    num_views = min(args.num_images, 16)
-    
-    for i in range(num_views):
-        # Use MVD-Fusion camera positions
-        azimuth = AZIMUTHS_16[i]
-        elevation = ELEVATIONS_16[i]
-        
-        # Set camera position
-        cam_pos = get_camera_position(azimuth, elevation, args.camera_dist)
-        cam.location = cam_pos
-        
-        # Set output paths
-        rgb_path = os.path.join(views_dir, f"{i:03d}_rgb.jpg")  # FIXED: .jpg
-        
-        # Configure file outputs for this frame
-        depth_output.file_slots[0].path = f"{i:03d}_depth"
-        mask_output.file_slots[0].path = f"{i:03d}_mask"
-        
-        # Set RGB output
-        scene.render.filepath = rgb_path
-        
-        # Render once - compositor handles all outputs
-        bpy.ops.render.render(write_still=True)
-        
-        # Rename depth and mask files (Blender adds frame numbers)
-        depth_temp = os.path.join(views_dir, f"{i:03d}_depth0001.png")
-        depth_final = os.path.join(views_dir, f"{i:03d}_depth.png")
-        mask_temp = os.path.join(views_dir, f"{i:03d}_mask0001.jpg")
-        mask_final = os.path.join(views_dir, f"{i:03d}_mask.jpg")
-        
-        if os.path.exists(depth_temp):
-            os.rename(depth_temp, depth_final)
-        if os.path.exists(mask_temp):
-            os.rename(mask_temp, mask_final)
-        
-        print(f"Rendered view {i:03d}/{num_views}")
-    save_camera_parameters_mvd(views_dir, num_views, args.camera_dist, cam)
-    print(f"✅ Completed {object_uid}: {num_views} views (RGB + Depth + Mask)")
+    # Blender substitutes the frame number for "###", so frame i is written
+    # as e.g. 000_rgb.jpg
+    for name, file_output in file_outputs.items():
+        file_output.base_path = views_dir
+        file_output.file_slots[0].path = f"###_{name}"
+
+    if "rgb" in MODALITIES:
+        # One animation render covers every view
+        scene.render.filepath = os.path.join(views_dir, "###_rgb.jpg")
+        bpy.ops.render.render(animation=True)
+    else:
+        # Animation renders always write the composite, so render frame by
+        # frame and let the file output nodes write depth/mask
+        for frame in range(NUM_VIEWS):
+            scene.frame_set(frame)
+            bpy.ops.render.render()
+
+    save_camera_parameters_mvd(views_dir, NUM_VIEWS, args.camera_dist, cam)
+    rendered = " + ".join(m for m in ("rgb", "depth", "mask") if m in MODALITIES)
+    print(f"✅ Completed {object_uid}: {NUM_VIEWS} views ({rendered})")
 
 
 def save_camera_parameters_mvd(views_dir, num_views, camera_dist=1.5, cam=None):
-    """Save MVD-Fusion camera parameters with proper intrinsics"""
-    camera_params = []
-    
+    """Save MVD-Fusion camera parameters with proper intrinsics
+
+    Per-view values are stored as arrays indexed by view id.
+    """
     # Calculate proper camera intrinsics
     focal_length = cam.data.lens
     sensor_width = cam.data.sensor_width
@@ -316,70 +431,135 @@ def save_camera_parameters_mvd(views_dir, num_views, camera_dist=1.5, cam=None):
     c_x = render.resolution_x / 2
     c_y = render.resolution_y / 2
     
+    # ✅ Get ACTUAL camera orientation after constraints, one depsgraph
+    # update per view
+    cam_matrices = np.empty((num_views, 4, 4))
     for i in range(num_views):
-        azimuth = AZIMUTHS_16[i]
-        elevation = ELEVATIONS_16[i]
-        
-        # Set camera to the same position as during rendering
-        cam_pos = get_camera_position(azimuth, elevation, camera_dist)
-        cam.location = cam_pos
-        
-        # ✅ Get ACTUAL camera orientation after constraints
-        bpy.context.view_layer.update()  # Ensure constraints are applied
-        cam_matrix = cam.matrix_world
-        
-        # Extract actual look direction from camera matrix
-        look_dir = cam_matrix @ Vector((0, 0, -1)) - cam_matrix.translation
-        look_target = cam_matrix.translation + look_dir
-        
-        # Extract actual up vector from camera matrix  
-        up_dir = cam_matrix @ Vector((0, 1, 0)) - cam_matrix.translation
-        
-        camera_params.append({
-            'view_id': i,
-            'azimuth': float(azimuth),
-            'elevation': float(elevation),
-            'camera_distance': float(camera_dist),
-            'position': [float(cam_pos[0]), float(cam_pos[1]), float(cam_pos[2])],
-            'target': [float(look_target.x), float(look_target.y), float(look_target.z)],
-            'up': [float(up_dir.x), float(up_dir.y), float(up_dir.z)],
+        scene.frame_set(i)  # Evaluates keyframe and constraints
+        cam_matrices[i] = cam.matrix_world
+    translations = cam_matrices[:, :3, 3]
+    
+    # Look target (position + look direction) and up vector from camera matrices
+    targets = (cam_matrices @ np.array([0.0, 0.0, -1.0, 1.0]))[:, :3]
+    ups = (cam_matrices @ np.array([0.0, 1.0, 0.0, 1.0]))[:, :3] - translations
+    
+    camera_params = {
+        'view_ids': list(range(num_views)),
+        'azimuths': AZIMUTHS_16[:num_views],
+        'elevations': ELEVATIONS_16[:num_views],
+        'camera_distance': float(camera_dist),
+        'positions': CAM_POS[:num_views].tolist(),
+        'targets': targets.tolist(),
+        'ups': ups.tolist(),
+        'intrinsics': {
             'focal_length': [float(f_x), float(f_y)],
             'principal_point': [float(c_x), float(c_y)],
             'image_size': [render.resolution_x, render.resolution_y],
             'sensor_size': [sensor_width, sensor_height]
-        })
+        }
+    }
     
     camera_file = os.path.join(views_dir, "cameras.json")
     with open(camera_file, 'w') as f:
         json.dump(camera_params, f, indent=2)
-    print(f"✅ Saved camera parameters for {num_views} views")
+
+# Shared keep-alive connections for all downloads, certificates are verified
+# against the certifi bundle shipped with requests
+DOWNLOAD_TIMEOUT = (10, 60)  # (connect, read) seconds
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
+
+
+def get_object_uid(object_path: str) -> str:
+    """Returns the uid naming both the download and the output directory."""
+    return object_path.split("/")[-1].split(".")[0]
+
 
 def download_object(object_url: str) -> str:
     """Download the object and return the path."""
-    uid = object_url.split("/")[-1].split(".")[0]
+    uid = get_object_uid(object_url)
     tmp_local_path = os.path.join("tmp-objects", f"{uid}.glb.tmp")
     local_path = os.path.join("tmp-objects", f"{uid}.glb")
     os.makedirs(os.path.dirname(tmp_local_path), exist_ok=True)
-    urllib.request.urlretrieve(object_url, tmp_local_path)
+    with session.get(object_url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        with open(tmp_local_path, "wb") as f:
+            shutil.copyfileobj(response.raw, f)
     os.rename(tmp_local_path, local_path)
     local_path = os.path.abspath(local_path)
     return local_path
 
 
+def fetch_object(object_path: str) -> str:
+    """Returns a local path for the object, downloading it if needed."""
+    if object_path.startswith("http"):
+        return download_object(object_path)
+    return object_path
+
+
+def prefetch_objects(
+    object_paths: List[str], num_prefetch: int
+) -> Iterator[Tuple[str, Future]]:
+    """Yields (object_path, local path future) pairs while the next
+    `num_prefetch` objects are downloaded in the background."""
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pending = deque()
+        for object_path in object_paths:
+            pending.append((object_path, executor.submit(fetch_object, object_path)))
+            if len(pending) > num_prefetch:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def render_object(object_path: str, local_path: Future, cam, file_outputs) -> None:
+    """Waits for the object download (if needed) and renders it."""
+    start_i = time.time()
+    local_path = local_path.result()
+    save_images(local_path, cam, file_outputs)
+    end_i = time.time()
+    print(f"✅ Finished {local_path} in {end_i - start_i:.1f} seconds")
+    if object_path.startswith("http"):
+        os.remove(local_path)
+
+
 if __name__ == "__main__":
-    try:
-        start_i = time.time()
-        if args.object_path.startswith("http"):
-            local_path = download_object(args.object_path)
-        else:
-            local_path = args.object_path
-        save_images(local_path)
-        end_i = time.time()
-        print(f"✅ Finished {local_path} in {end_i - start_i:.1f} seconds")
-        if args.object_path.startswith("http"):
-            os.remove(local_path)
-    except Exception as e:
-        print(f"❌ Failed to render {args.object_path}")
-        print(e)
-        import traceback
-        traceback.print_exc()
\ No newline at end of file
+    if args.object_list:
+        with open(args.object_list, "r") as f:
+            object_paths = json.load(f)
+    else:
+        object_paths = [args.object_path]
+
+    # Entries sharing a uid would download to the same tmp-objects file (and
+    # one render would delete it under the other) and render into the same
+    # views directory, so only the first one is kept
+    unique_paths = {}
+    for object_path in object_paths:
+        unique_paths.setdefault(get_object_uid(object_path), object_path)
+    if len(unique_paths) < len(object_paths):
+        print(f"⚠️ Skipping {len(object_paths) - len(unique_paths)} duplicate objects")
+    object_paths = list(unique_paths.values())
+
+    # Lighting, camera and compositor are set up once and reused across objects
+    cam, file_outputs = setup_scene()
+    failed_paths = []
+    for object_path, local_path in prefetch_objects(object_paths, args.num_prefetch):
+        try:
+            render_object(object_path, local_path, cam, file_outputs)
+        except Exception as e:
+            print(f"❌ Failed to render {object_path}")
+            print(e)
+            import traceback
+            traceback.print_exc()
+            failed_paths.append(object_path)
+
+    if args.failed_list:
+        with open(args.failed_list, "w") as f:
+            json.dump(failed_paths, f)
+    if failed_paths:
+        print(f"❌ {len(failed_paths)}/{len(object_paths)} objects failed to render")
+        # Blender exits 0 after a -P script unless told otherwise
+        sys.exit(1)
@@ -1,7 +1,7 @@
 # scripts/download_filtered.py
-import json
+import orjson
 import os
-import objaverse
+from objaverse_cache import load_object_paths_cached
 from tqdm import tqdm
 import argparse
 
@@ -16,13 +16,13 @@ def create_download_list(filtered_uids_file, output_file, batch_size=1000):
     """
     
     # Load filtered UIDs
-    with open(filtered_uids_file, 'r') as f:
-        filtered_uids = json.load(f)
+    with open(filtered_uids_file, 'rb') as f:
+        filtered_uids = orjson.loads(f.read())
     
     print(f"Loaded {len(filtered_uids)} filtered UIDs")
     
     # Load object paths from Objaverse
-    object_paths = objaverse._load_object_paths()
+    object_paths = load_object_paths_cached()
     
     # Convert to download URLs
     download_urls = []
@@ -45,18 +45,35 @@ def create_download_list(filtered_uids_file, output_file, batch_size=1000):
         batch = download_urls[i:i + batch_size]
         batch_file = f"download_batches/{output_file}_batch_{i//batch_size}.json"
         
-        with open(batch_file, 'w') as f:
-            json.dump(batch, f, indent=2)
-        
-        print(f"Created batch {i//batch_size} with {len(batch)} objects")
+        with open(batch_file, 'wb') as f:
+            f.write(orjson.dumps(batch, option=orjson.OPT_INDENT_2))
     
     # Also create a single file with all URLs
-    with open(f"download_batches/{output_file}_all.json", 'w') as f:
-        json.dump(download_urls, f, indent=2)
+    with open(f"download_batches/{output_file}_all.json", 'wb') as f:
+        f.write(orjson.dumps(download_urls, option=orjson.OPT_INDENT_2))
     
-    print(f"\nCreated {len(download_urls)//batch_size + 1} batch files in 'download_batches/'")
+    num_batches = (len(download_urls) + batch_size - 1) // batch_size
+    print(f"\nCreated {num_batches} batch files of up to {batch_size} objects in 'download_batches/'")
     return download_urls
 
+# Per-view files written by blender_script.py, one set per --modalities entry
+VIEW_SUFFIXES = ('_rgb.jpg', '_depth.exr', '_mask.jpg')
+
+def count_views(directory, limit):
+    """
+    Count the views of the most complete modality in directory, stopping once
+    any modality reaches limit.
+    """
+    counts = dict.fromkeys(VIEW_SUFFIXES, 0)
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            for suffix in VIEW_SUFFIXES:
+                if entry.name.endswith(suffix):
+                    counts[suffix] += 1
+                    if counts[suffix] >= limit:
+                        return counts[suffix]
+    return max(counts.values())
+
 def check_existing_renders(output_dir="./views"):
     """
     Check which objects have already been rendered to avoid re-rendering.
@@ -64,13 +81,17 @@ def check_existing_renders(output_dir="./views"):
     completed_uids = set()
     
     if os.path.exists(output_dir):
-        for item in os.listdir(output_dir):
-            item_path = os.path.join(output_dir, item)
-            if os.path.isdir(item_path):
-                # Check if this object has all 16 views + cameras.json
-                png_files = [f for f in os.listdir(item_path) if f.endswith('.png')]
-                if len(png_files) >= 16 and os.path.exists(os.path.join(item_path, 'cameras.json')):
-                    completed_uids.add(item)
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                # blender_script.py writes <output_dir>/<uid>/views/
+                views_dir = os.path.join(entry.path, 'views')
+                # Check if this object has cameras.json + all 16 views
+                if not os.path.exists(os.path.join(views_dir, 'cameras.json')):
+                    continue
+                if count_views(views_dir, limit=16) >= 16:
+                    completed_uids.add(entry.name)
     
     print(f"Found {len(completed_uids)} already rendered objects")
     return completed_uids
@@ -92,15 +113,15 @@ def main():
     if args.skip_completed:
         completed_uids = check_existing_renders()
         # Load filtered UIDs and remove completed ones
-        with open(args.filtered_file, 'r') as f:
-            filtered_uids = json.load(f)
+        with open(args.filtered_file, 'rb') as f:
+            filtered_uids = orjson.loads(f.read())
         
         filtered_uids = [uid for uid in filtered_uids if uid not in completed_uids]
         
         # Save updated list
         updated_file = args.filtered_file.replace('.json', '_remaining.json')
-        with open(updated_file, 'w') as f:
-            json.dump(filtered_uids, f, indent=2)
+        with open(updated_file, 'wb') as f:
+            f.write(orjson.dumps(filtered_uids, option=orjson.OPT_INDENT_2))
         
         print(f"Filtered to {len(filtered_uids)} remaining objects (saved to {updated_file})")
         args.filtered_file = updated_file
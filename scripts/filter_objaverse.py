@@ -1,8 +1,17 @@
 # simple_filter.py
 import json
-import objaverse
-import random
-from tqdm import tqdm
+import numpy as np
+import re
+import pandas as pd
+from objaverse_cache import load_object_paths_cached
+
+# Path substrings that usually indicate test/placeholder objects
+EXCLUSION_TERMS = [
+    'test', 'temp', 'placeholder', 'broken', 'wip', 
+    'untextured', 'lowpoly', 'simple', 'cube', 'sphere',
+    'plane', 'default', 'example'
+]
+EXCLUSION_PATTERN = '|'.join(re.escape(term) for term in EXCLUSION_TERMS)
 
 def simple_quality_filter(sample_size=1000):
     """
@@ -10,44 +19,27 @@ def simple_quality_filter(sample_size=1000):
     This avoids the thumbnail dependency
     """
     print("Loading Objaverse UIDs...")
-    uids = objaverse.load_uids()
-    object_paths = objaverse._load_object_paths()
+    object_paths = load_object_paths_cached()
+    uids = list(object_paths.keys())  # same as objaverse.load_uids()
     
     print(f"Total UIDs available: {len(uids)}")
     
     # Take a random sample
-    random.seed(42)
-    sampled_uids = random.sample(uids, min(sample_size, len(uids)))
-    
-    filtered_uids = []
-    exclusion_terms = [
-        'test', 'temp', 'placeholder', 'broken', 'wip', 
-        'untextured', 'lowpoly', 'simple', 'cube', 'sphere',
-        'plane', 'default', 'example'
-    ]
+    rng = np.random.default_rng(42)
+    sample_idx = rng.choice(len(uids), size=min(sample_size, len(uids)), replace=False)
+    sampled_uids = [uids[i] for i in sample_idx]
     
     print("Filtering based on file paths...")
-    for uid in tqdm(sampled_uids):
-        path = object_paths.get(uid, "")
-        
-        # Skip if no path
-        if not path:
-            continue
-            
-        # Skip non-GLB files
-        if not path.endswith('.glb'):
-            continue
-            
-        # Skip obviously bad objects based on path names
-        path_lower = path.lower()
-        if any(bad_term in path_lower for bad_term in exclusion_terms):
-            continue
-            
-        # Skip very short paths (often indicate test objects)
-        if len(path) < 10:
-            continue
-            
-        filtered_uids.append(uid)
+    paths = pd.Series({uid: object_paths.get(uid, "") for uid in sampled_uids}, dtype=str)
+    
+    # Keep GLB files, skip obviously bad objects based on path names and very
+    # short paths (often indicate test objects)
+    mask = (
+        paths.str.endswith('.glb')
+        & ~paths.str.lower().str.contains(EXCLUSION_PATTERN, regex=True)
+        & (paths.str.len() >= 10)
+    )
+    filtered_uids = paths.index[mask].tolist()
     
     print(f"Filtered: {len(filtered_uids)}/{len(sampled_uids)} objects passed")
     return filtered_uids
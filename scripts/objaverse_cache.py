@@ -0,0 +1,31 @@
+# objaverse_cache.py
+import os
+import pickle
+import objaverse
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "objaverse_paths.pkl")
+
+# Index file that objaverse._load_object_paths() downloads and parses
+OBJECT_PATHS_FILE = os.path.join(objaverse._VERSIONED_PATH, "object-paths.json.gz")
+
+def load_object_paths_cached(cache_file=CACHE_FILE):
+    """
+    Load the Objaverse uid -> object path mapping, caching it as a pickle.
+    The cache is rebuilt whenever the upstream index is newer than it.
+    """
+    if (
+        os.path.exists(cache_file)
+        and os.path.exists(OBJECT_PATHS_FILE)
+        and os.path.getmtime(cache_file) >= os.path.getmtime(OBJECT_PATHS_FILE)
+    ):
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+
+    object_paths = objaverse._load_object_paths()
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(object_paths, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, cache_file)
+    return object_paths
@@ -0,0 +1,138 @@
+import functools
+import json
+import multiprocessing
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import tyro
+
+
+@dataclass
+class Args:
+    input_models_path: str
+    """Path to a json file containing a list of 3D object files"""
+
+    num_gpus: int = -1
+    """number of gpus to use. -1 means all available gpus"""
+
+    objects_per_shard: int = 8
+    """number of objects rendered by a single Blender session"""
+
+    blender_path: str = "./blender-3.2.2-linux-x64/blender"
+    """Path to the Blender executable"""
+
+    output_dir: str = "./views"
+    """Directory the rendered views are written to"""
+
+    failed_output: str = "failed_objects.json"
+    """Path of a json file the objects that failed to render are written to"""
+
+
+def count_gpus() -> int:
+    result = subprocess.run(["nvidia-smi", "-L"], capture_output=True, text=True)
+    return len([line for line in result.stdout.splitlines() if line.strip()])
+
+
+def init_worker(gpu_queue: multiprocessing.Queue) -> None:
+    # Pin every Blender process spawned by this worker to one GPU
+    gpu = gpu_queue.get()
+    os.environ["CUDA_VISIBLE_DEVICES"] = str(gpu)
+
+
+def render_shard(
+    shard: List[str], blender_path: str, output_dir: str
+) -> Tuple[List[str], List[str], int]:
+    """Renders a shard in one Blender session.
+
+    Returns the shard, the objects that failed and Blender's exit code. If
+    Blender dies before writing its failed list, the whole shard failed.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".json", prefix="shard_", delete=False
+    ) as f:
+        json.dump(shard, f)
+        shard_path = f.name
+    failed_path = shard_path[: -len(".json")] + "_failed.json"
+
+    gpu = os.environ["CUDA_VISIBLE_DEVICES"]
+    print(f"Rendering {len(shard)} objects on GPU {gpu}")
+    try:
+        result = subprocess.run(
+            [
+                blender_path,
+                "-b",
+                # Non-zero exit status on uncaught script errors (e.g. no GPU)
+                "--python-exit-code",
+                "1",
+                "-P",
+                "blender_script.py",
+                "--",
+                "--object_list",
+                shard_path,
+                "--output_dir",
+                output_dir,
+                "--failed_list",
+                failed_path,
+            ],
+            env={**os.environ, "DISPLAY": ":1"},
+        )
+        if os.path.exists(failed_path):
+            with open(failed_path, "r") as f:
+                failed = json.load(f)
+        else:
+            failed = shard
+    finally:
+        os.remove(shard_path)
+        if os.path.exists(failed_path):
+            os.remove(failed_path)
+    return shard, failed, result.returncode
+
+
+if __name__ == "__main__":
+    args = tyro.cli(Args)
+    num_gpus = count_gpus() if args.num_gpus == -1 else args.num_gpus
+
+    with open(args.input_models_path, "r") as f:
+        model_paths = json.load(f)
+    shards = [
+        model_paths[i : i + args.objects_per_shard]
+        for i in range(0, len(model_paths), args.objects_per_shard)
+    ]
+
+    gpu_queue = multiprocessing.Queue()
+    for gpu_i in range(num_gpus):
+        gpu_queue.put(gpu_i)
+
+    # Workers get their settings explicitly so spawn/forkserver start methods work
+    render = functools.partial(
+        render_shard, blender_path=args.blender_path, output_dir=args.output_dir
+    )
+
+    # chunksize=1 lets idle GPUs pick up the next shard as soon as they finish
+    count = 0
+    failed_objects = []
+    with multiprocessing.Pool(
+        num_gpus, initializer=init_worker, initargs=(gpu_queue,)
+    ) as pool:
+        for shard, failed, returncode in pool.imap_unordered(
+            render, shards, chunksize=1
+        ):
+            if failed:
+                print(
+                    f"❌ {len(failed)}/{len(shard)} objects failed in shard "
+                    f"(Blender exit code {returncode})"
+                )
+                failed_objects.extend(failed)
+            count += len(shard) - len(failed)
+            print(f"Progress: {count}/{len(model_paths)} objects")
+
+    if failed_objects:
+        with open(args.failed_output, "w") as f:
+            json.dump(failed_objects, f, indent=2)
+        print(
+            f"❌ {len(failed_objects)} objects failed to render, "
+            f"saved to {args.failed_output} for a retry"
+        )
@@ -1,5 +1,5 @@
 # create_subset_lists.py
-import json
+import orjson
 import os
 import random
 
@@ -26,10 +26,10 @@ print(f"Train: {len(train_uids)}, Test: {len(test_uids)}")
 # Save subset lists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-with open(f"{OUTPUT_DIR}/15k_train.json", 'w') as f:
-    json.dump(train_uids, f, indent=2)
+with open(f"{OUTPUT_DIR}/15k_train.json", 'wb') as f:
+    f.write(orjson.dumps(train_uids, option=orjson.OPT_INDENT_2))
 
-with open(f"{OUTPUT_DIR}/15k_test.json", 'w') as f:
-    json.dump(test_uids, f, indent=2)
+with open(f"{OUTPUT_DIR}/15k_test.json", 'wb') as f:
+    f.write(orjson.dumps(test_uids, option=orjson.OPT_INDENT_2))
 
 print("✅ Created subset list files")
\ No newline at end of file
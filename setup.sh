@@ -3,10 +3,5 @@ wget https://download.blender.org/release/Blender3.2/blender-3.2.2-linux-x64.tar
 tar -xf blender-3.2.2-linux-x64.tar.xz
 rm blender-3.2.2-linux-x64.tar.xz
 
-# this is needed to download urls in blender
-# https://github.com/python-poetry/poetry/issues/5117#issuecomment-1058747106
-sudo update-ca-certificates --fresh
-export SSL_CERT_DIR=/etc/ssl/certs
-
 sudo python3 start_xserver.py start || true
 pip install -r requirements.txt